@@ -0,0 +1,93 @@
+"""
+Microbenchmark of the batch collate: F.pad + torch.stack versus the single-allocation `pad_batch`.
+
+Reports, per batch, the mean latency and the bytes allocated on the CPU (from torch.profiler)
+for raw waveforms (C=1, float32 and int16) and MFCC features (C=40). With CUDA available,
+pad_batch is also timed writing straight to pinned memory, against pad_batch followed by the
+`pin_memory()` copy that the DataLoader would otherwise make.
+
+Expected allocations per batch follow from the implementations. F.pad + torch.stack
+allocates the padded output twice: once per item, then again for the stack. pad_batch
+allocates it once. For the default batch (B=32, clips of 1 to 5 s, max length close to 5 s):
+
+    case                   pad + stack   pad_batch
+    raw float32 [B, 1, T]  ~19.5 MiB     ~9.8 MiB
+    raw int16   [B, 1, T]  ~9.8 MiB      ~4.9 MiB
+    mfcc        [B, 40, F] ~4.9 MiB      ~2.4 MiB
+
+These figures are computed, not measured. Run the script to measure the latencies, which
+depend on the machine, and to confirm the allocations.
+
+Usage:
+    python benchmarks/collate_benchmark.py [--batch-size 32] [--iters 50]
+"""
+import argparse
+import time
+
+import torch
+import torch.nn.functional as F
+from torch.profiler import profile, ProfilerActivity
+
+from SERonEmoDB.data_ingest.data_ingest import pad_batch
+
+
+def pad_and_stack(feats):
+    """Reference implementation: one padded copy per item, then a second copy by torch.stack."""
+    max_len = max(f.shape[-1] for f in feats)
+    return torch.stack([F.pad(f, (0, max_len - f.shape[-1])) for f in feats])
+
+
+def make_batch(batch_size, channels, frames_per_second, dtype):
+    """Random variable-length features of 1 to 5 seconds."""
+    lengths = torch.randint(frames_per_second, 5 * frames_per_second, (batch_size,))
+    feats = [torch.randn(channels, int(n)) for n in lengths]
+    if dtype == torch.int16:
+        feats = [f.clamp(-1, 1).mul(32767).to(torch.int16) for f in feats]
+    return feats
+
+
+def allocated_bytes(fn):
+    """Total bytes allocated on the CPU while running `fn` once."""
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        fn()
+    # cpu_memory_usage also includes the allocations of child ops, which would be counted twice
+    return sum(e.self_cpu_memory_usage for e in prof.events() if e.self_cpu_memory_usage > 0)
+
+
+def latency_ms(fn, iters):
+    """Mean wall-clock latency of `fn` in milliseconds, after a warm-up call."""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) / iters * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--iters", type=int, default=50)
+    args = parser.parse_args()
+
+    cases = {
+        "raw float32 [B, 1, T]": (1, 16000, torch.float32),
+        "raw int16   [B, 1, T]": (1, 16000, torch.int16),
+        "mfcc        [B, 40, F]": (40, 100, torch.float32),
+    }
+    print(f"{'case':<24}{'collate':<16}{'latency (ms)':>14}{'alloc (MiB)':>14}")
+    for name, (channels, fps, dtype) in cases.items():
+        feats = make_batch(args.batch_size, channels, fps, dtype)
+        impls = {
+            "pad + stack": lambda: pad_and_stack(feats),
+            "pad_batch": lambda: pad_batch(feats),
+        }
+        if torch.cuda.is_available():
+            impls["pad_batch+pin"] = lambda: pad_batch(feats)[0].pin_memory()
+            impls["pad_batch(pin)"] = lambda: pad_batch(feats, pin_memory=True)
+        for impl_name, fn in impls.items():
+            mib = allocated_bytes(fn) / 2 ** 20
+            print(f"{name:<24}{impl_name:<16}{latency_ms(fn, args.iters):>14.3f}{mib:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,28 @@ Lightning DataModule interfaces for seamless integration with deep learning work
 
 Key Components:
 - EMOTION_MAP: Mapping between EMO-DB emotion codes and numerical labels
+- quantize / dequantize: Conversion between float waveforms and compact int16 PCM
 - EmoDBDataset: PyTorch Dataset implementation for EMO-DB
+- write_shards / write_emodb_shards: Convert a WAV directory into WebDataset-style tar shards
+- ShardedEmoDBDataset: Streaming IterableDataset over tar shards
+- ShardEpochCallback: Lightning callback reshuffling the shards every epoch
+- pad_batch: Single-allocation padding of variable-length features
 - EmoDataModule: Lightning DataModule for handling data splitting and loading
 """
 
+import glob
+import io
+import itertools
+import math
 import os
+import random
+import tarfile
 import torch
+import torch.distributed as dist
 import torchaudio
-from torch.utils.data import Dataset, DataLoader
-import torch.nn.functional as F
+import lightning as L
+from torch.utils.data import Dataset, DataLoader, IterableDataset, get_worker_info
+import torch.nn as nn
 from SERonEmoDB.contracts.base_data import BaseLightningDataModule, BaseLightningDataset
 import kagglehub
 import zipfile
@@ -31,6 +44,46 @@ EMOTION_MAP = {
     'N': 6,  # neutral
 }
 
+# Scale between float waveforms in [-1, 1) and int16 PCM, the same one torchaudio uses to decode
+INT16_SCALE = 32768.0
+
+
+def quantize(waveform: torch.Tensor) -> torch.Tensor:
+    """Convert a float waveform in [-1, 1) to int16 PCM."""
+    return (waveform * INT16_SCALE).round().clamp(-32768, 32767).to(torch.int16)
+
+
+def dequantize(x: torch.Tensor) -> torch.Tensor:
+    """Convert int16 PCM back to a float32 waveform in [-1, 1)."""
+    return x.to(torch.float32) / INT16_SCALE
+
+
+def _load_features(source, transform=None, compact=False):
+    """
+    Load an audio file (path or file-like object) and turn it into model features.
+
+    Resamples to 16 kHz and applies `transform`. In compact mode, raw waveforms (no transform
+    or nn.Identity) are returned as int16: 16-bit 16 kHz sources are returned as their
+    source PCM without any float decode, other sources are decoded and quantized.
+    Transformed features stay float.
+    """
+    raw = transform is None or isinstance(transform, nn.Identity)
+    if compact and raw:
+        pcm, sr = torchaudio.load(source, normalize=False)  # [1, T], native dtype
+        if pcm.dtype == torch.int16 and sr == 16000:
+            return pcm
+        if hasattr(source, "seek"):
+            source.seek(0)
+    waveform, sr = torchaudio.load(source)  # [1, T]
+    # Resample to 16 kHz if needed
+    if sr != 16000:
+        waveform = torchaudio.transforms.Resample(sr, 16000)(waveform)
+    if raw:
+        return quantize(waveform) if compact else waveform
+    # Apply transform (e.g., MFCC)
+    return transform(waveform)
+
+
 # def download_data(dataset="piyushagni5/berlin-database-of-emotional-speech-emodb",
 #                   root_dir="datas",
 #                   force_download=False):
@@ -75,18 +128,20 @@ class EmoDBDataset(BaseLightningDataset):
         data_dir (str): Directory containing the WAV files
         files_list (list, optional): Specific list of files to use. If None, uses all WAV files in data_dir
         transform (callable, optional): Transform to apply to the audio waveform
+        compact (bool, optional): Return raw waveforms as int16 instead of float32. Defaults to False
     
     Returns:
         tuple: (features, label) where features is a tensor of shape [1, T] or transformed shape,
                and label is an integer emotion class index
     """
 
-    def __init__(self, data_dir, files_list=None, transform=None):
+    def __init__(self, data_dir, files_list=None, transform=None, compact=False):
         super().__init__()
         self.data_dir = data_dir
         # Use provided file list or list all WAVs in directory
         self.files = files_list if files_list is not None else [f for f in os.listdir(data_dir) if f.endswith('.wav')]
         self.transform = transform
+        self.compact = compact
 
     def __len__(self):
         return len(self.files)
@@ -105,17 +160,344 @@ class EmoDBDataset(BaseLightningDataset):
         """
         fname = self.files[idx]
         path = os.path.join(self.data_dir, fname)
-        waveform, sr = torchaudio.load(path)  # [1, T]
-        # Resample to 16 kHz if needed
-        if sr != 16000:
-            waveform = torchaudio.transforms.Resample(sr, 16000)(waveform)
         # Parse emotion label from filename (6th character)
         letter = fname[5]
         label = EMOTION_MAP.get(letter)
-        # Apply transform (e.g., MFCC) if provided
-        features = self.transform(waveform) if self.transform else waveform
+        features = _load_features(path, self.transform, self.compact)
+        return features, label
+
+
+def split_files(data_dir, split_ratio=0.8):
+    """
+    Split the WAV files of a directory into train and test lists.
+
+    Files are sorted for reproducibility before splitting, so the same directory and
+    ratio always give the same split.
+
+    Args:
+        data_dir (str): Directory containing the WAV files
+        split_ratio (float, optional): Fraction of files used for training. Defaults to 0.8
+
+    Returns:
+        tuple: (train_files, test_files) lists of file names
+    """
+    all_files = sorted([f for f in os.listdir(data_dir) if f.endswith('.wav')])
+    cutoff = int(len(all_files) * split_ratio)
+    return all_files[:cutoff], all_files[cutoff:]
+
+
+def _dist_info():
+    """
+    Return (rank, world_size) of the current process.
+
+    Reads the initialized process group, falling back to the RANK / WORLD_SIZE environment
+    variables set by torchrun and Lightning launchers. Call it in the main process: DataLoader
+    workers started with spawn or forkserver have no process group.
+    """
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank(), dist.get_world_size()
+    return int(os.environ.get("RANK", 0)), int(os.environ.get("WORLD_SIZE", 1))
+
+
+def _add_bytes(tar, name, data):
+    """Add an in-memory member `name` with content `data` to an open tar archive."""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_shards(data_dir, out_dir, files_list=None, labels=None, prefix="shard", samples_per_shard=1000):
+    """
+    Convert a directory of WAV files into WebDataset-style tar shards.
+
+    Each sample is stored as two consecutive tar members sharing the same key: `<key>.wav`
+    (the original file bytes) and `<key>.cls` (the integer label as text). Shards are named
+    `<prefix>-000000.tar`, `<prefix>-000001.tar`, ...
+
+    Args:
+        data_dir (str): Directory containing the WAV files
+        out_dir (str): Directory where the shards are written (created if missing)
+        files_list (list, optional): Specific list of files to pack. If None, uses all WAV files in data_dir
+        labels (dict, optional): Mapping file name -> integer label. If None, the label is parsed
+            from the 6th character of the file name with EMOTION_MAP
+        prefix (str, optional): Shard file name prefix. Defaults to "shard"
+        samples_per_shard (int, optional): Maximum number of samples per shard. Defaults to 1000
+
+    Returns:
+        list: Paths of the written shards
+
+    Raises:
+        ValueError: If a file has no label, before any shard is written
+    """
+    files = files_list if files_list is not None else sorted(f for f in os.listdir(data_dir) if f.endswith('.wav'))
+    if labels is None:
+        labels = {fname: EMOTION_MAP.get(fname[5:6]) for fname in files}
+    for fname in files:
+        if labels.get(fname) is None:
+            raise ValueError(f"No label for {fname}: pass it in `labels` or use an EMO-DB file name")
+    os.makedirs(out_dir, exist_ok=True)
+    shard_paths = []
+    for start in range(0, len(files), samples_per_shard):
+        path = os.path.join(out_dir, f"{prefix}-{len(shard_paths):06d}.tar")
+        with tarfile.open(path, "w") as tar:
+            for fname in files[start:start + samples_per_shard]:
+                key = os.path.splitext(fname)[0]
+                label = labels[fname]
+                tar.add(os.path.join(data_dir, fname), arcname=f"{key}.wav")
+                _add_bytes(tar, f"{key}.cls", str(label).encode())
+        shard_paths.append(path)
+    return shard_paths
+
+
+def write_emodb_shards(data_dir, out_dir, split_ratio=0.8, samples_per_shard=1000):
+    """
+    Write `train-*.tar` and `val-*.tar` shards using the same split as EmoDataModule.
+
+    Args:
+        data_dir (str): Directory containing the WAV files
+        out_dir (str): Directory where the shards are written
+        split_ratio (float, optional): Train/test split ratio. Defaults to 0.8
+        samples_per_shard (int, optional): Maximum number of samples per shard. Defaults to 1000
+
+    Returns:
+        tuple: (train_shards, val_shards) lists of shard paths
+    """
+    train_files, test_files = split_files(data_dir, split_ratio)
+    train_shards = write_shards(data_dir, out_dir, train_files, prefix="train", samples_per_shard=samples_per_shard)
+    val_shards = write_shards(data_dir, out_dir, test_files, prefix="val", samples_per_shard=samples_per_shard)
+    return train_shards, val_shards
+
+
+class ShardedEmoDBDataset(IterableDataset):
+    """
+    Streaming dataset reading (features, label) samples from tar shards.
+
+    Shards are read sequentially, one at a time, so memory stays flat regardless of the
+    corpus size. Shards are partitioned across DataLoader workers, so every sample is seen
+    exactly once per epoch.
+
+    Under distributed training, shards are partitioned across ranks as well, and every
+    (rank, worker) pair yields exactly the same number of samples, the smallest total among
+    them, so that all ranks run the same number of steps. This drops at most the samples in
+    excess of that count (e.g. from a partial last shard) each epoch, and requires at least
+    `world_size * num_workers` shards.
+
+    The rank and world size are read when the dataset is created, in the main process (see
+    `_dist_info`), since DataLoader workers may not share its process group.
+
+    When `shuffle` is True, the shard order is shuffled with a seed shared by all ranks
+    and samples are shuffled within a buffer of `buffer_size` elements, seeded per
+    (epoch, rank, worker). Call `set_epoch`
+    before each epoch to get a different order per epoch; EmoDataModule does this through
+    ShardEpochCallback.
+
+    Args:
+        shards (list or str): List of shard paths, or a glob pattern such as "shards/train-*.tar"
+        transform (callable, optional): Transform to apply to the audio waveform
+        shuffle (bool, optional): Shuffle shards and samples. Defaults to False
+        buffer_size (int, optional): Size of the sample shuffle buffer. Defaults to 1000
+        seed (int, optional): Base seed for shuffling. Defaults to 0
+        compact (bool, optional): Yield raw waveforms as int16 instead of float32. Defaults to False
+        rank (int, optional): Distributed rank. Defaults to the current one
+        world_size (int, optional): Number of distributed ranks. Defaults to the current one
+
+    Raises:
+        FileNotFoundError: If `shards` is a pattern that matches no file
+        ValueError: If `shards` is an empty list
+
+    Yields:
+        tuple: (features, label) exactly like EmoDBDataset
+    """
+
+    def __init__(self, shards, transform=None, shuffle=False, buffer_size=1000, seed=0, compact=False, rank=None,
+                 world_size=None):
+        super().__init__()
+        if isinstance(shards, str):
+            self.shards = sorted(glob.glob(shards))
+            if not self.shards:
+                raise FileNotFoundError(f"No shard matches {shards!r}")
+        else:
+            self.shards = list(shards)
+            if not self.shards:
+                raise ValueError("ShardedEmoDBDataset needs at least one shard")
+        self.transform = transform
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.compact = compact
+        current_rank, current_world_size = _dist_info()
+        self.rank = current_rank if rank is None else rank
+        self.world_size = current_world_size if world_size is None else world_size
+        self.epoch = 0
+        self._sample_counts = None
+
+    def set_epoch(self, epoch):
+        """Set the epoch used to derive the shuffling seed."""
+        self.epoch = epoch
+
+    def sample_counts(self) -> dict:
+        """
+        Return the number of samples of every shard, read from the tar headers only.
+
+        The result is cached, so calling it in the main process before the DataLoader
+        starts saves every worker from scanning the headers again.
+        """
+        if self._sample_counts is None:
+            self._sample_counts = {}
+            for path in self.shards:
+                with tarfile.open(path) as tar:
+                    self._sample_counts[path] = sum(1 for name in tar.getnames() if name.endswith(".cls"))
+        return self._sample_counts
+
+    def _worker_shards(self):
+        """
+        Return the shards assigned to the current (rank, worker) pair.
+
+        Returns:
+            tuple: (shards, limit) where `limit` is the number of samples to yield, or None for all
+
+        Raises:
+            ValueError: Under distributed training, if there are fewer shards than (rank, worker) pairs
+        """
+        shards = list(self.shards)
+        if self.shuffle:
+            random.Random(f"{self.seed}-{self.epoch}").shuffle(shards)
+        rank, world_size = self.rank, self.world_size
+        info = get_worker_info()
+        worker_id, num_workers = (info.id, info.num_workers) if info is not None else (0, 1)
+        n_slots = world_size * num_workers
+        assigned = shards[rank * num_workers + worker_id::n_slots]
+        if world_size == 1:
+            return assigned, None
+
+        # Every rank must run the same number of steps, or the gradient all-reduce hangs
+        if len(shards) < n_slots:
+            raise ValueError(f"{len(shards)} shards cannot feed {world_size} ranks x {num_workers} workers")
+        counts = self.sample_counts()
+        limit = min(sum(counts[path] for path in shards[slot::n_slots]) for slot in range(n_slots))
+        return assigned, limit
+
+    @staticmethod
+    def _check_sample(path, key, sample):
+        """Return `sample` if it has both its audio and its label, raise otherwise."""
+        missing = [ext for ext in (".wav", ".cls") if ext not in sample]
+        if missing:
+            raise ValueError(f"Sample {key!r} in shard {path} has no {', '.join(missing)} member")
+        return sample
+
+    @classmethod
+    def _iter_raw(cls, shards):
+        """Yield raw samples as dicts {extension: bytes}, grouping consecutive members by key."""
+        for path in shards:
+            with tarfile.open(path, "r|") as tar:
+                key, sample = None, {}
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    member_key, ext = os.path.splitext(member.name)
+                    if key is not None and member_key != key:
+                        yield cls._check_sample(path, key, sample)
+                        sample = {}
+                    key = member_key
+                    sample[ext] = tar.extractfile(member).read()
+                if sample:
+                    yield cls._check_sample(path, key, sample)
+
+    def _decode(self, sample) -> tuple[torch.Tensor, int]:
+        """Decode a raw sample into (features, label)."""
+        label = int(sample[".cls"])
+        features = _load_features(io.BytesIO(sample[".wav"]), self.transform, self.compact)
         return features, label
 
+    def __iter__(self):
+        shards, limit = self._worker_shards()
+        samples = itertools.islice(self._iter_raw(shards), limit)
+        if not self.shuffle:
+            for sample in samples:
+                yield self._decode(sample)
+            return
+        info = get_worker_info()
+        rng = random.Random(f"{self.seed}-{self.epoch}-{self.rank}-{info.id if info is not None else 0}")
+        # Buffer raw bytes rather than decoded features to keep memory bounded by the source size
+        buffer = []
+        for sample in samples:
+            if len(buffer) < self.buffer_size:
+                buffer.append(sample)
+                continue
+            i = rng.randrange(len(buffer))
+            yield self._decode(buffer[i])
+            buffer[i] = sample
+        rng.shuffle(buffer)
+        for sample in buffer:
+            yield self._decode(sample)
+
+
+class ShardEpochCallback(L.Callback):
+    """
+    Advance the shuffling epoch of a ShardedEmoDBDataset at the start of every training epoch.
+
+    Lightning only calls `set_epoch` on samplers, and reuses the same dataloader across
+    epochs unless `reload_dataloaders_every_n_epochs` is set. The new epoch is set in the main
+    process before the DataLoader workers of that epoch are started, so they all see it.
+    EmoDataModule registers this callback automatically for sharded training.
+
+    Args:
+        dataset (ShardedEmoDBDataset): Dataset to reseed
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def on_train_epoch_start(self, trainer, pl_module):
+        self.dataset.set_epoch(trainer.current_epoch)
+
+
+def pad_batch(feats, pin_memory=False) -> tuple[torch.Tensor, torch.Tensor]:
+    """
+    Pad variable-length features into a single [B, *C, max_len] tensor.
+
+    The output is allocated once and every item is written in place. Inside a DataLoader
+    worker the output lives directly in shared memory (as torch's default_collate does), so
+    it is not copied again on its way to the main process. Outside of workers it can be
+    allocated in pinned memory, which the DataLoader would otherwise copy it into. Pinned
+    blocks come from torch's caching host allocator, which only hands a freed block out again
+    once the non-blocking host-to-GPU copies that read it have completed.
+
+    Args:
+        feats (sequence): Tensors of shape [*C, T_i]; all leading dimensions must match
+        pin_memory (bool, optional): Allocate the output in pinned memory outside of DataLoader workers.
+            Defaults to False
+
+    Returns:
+        tuple: (padded, lengths)
+            - padded: Tensor of shape [B, *C, max_len] with the dtype of the inputs
+            - lengths: Long tensor of shape [B] with the original lengths
+
+    Raises:
+        ValueError: If items do not share the same leading (channel) shape
+    """
+    lead = feats[0].shape[:-1]
+    for f in feats:
+        if f.shape[:-1] != lead:
+            raise ValueError(f"All items must share the leading shape {tuple(lead)}, got {tuple(f.shape[:-1])}")
+    lengths = torch.tensor([f.shape[-1] for f in feats], dtype=torch.long)
+    shape = (len(feats), *lead, int(lengths.max()))
+
+    elem = feats[0]
+    if get_worker_info() is not None:
+        storage = elem._typed_storage()._new_shared(math.prod(shape), device=elem.device)
+        out = elem.new(storage).resize_(shape)
+    else:
+        out = torch.empty(shape, dtype=elem.dtype, pin_memory=pin_memory)
+
+    # Buffers are uninitialised, so the padding tail is zeroed explicitly
+    for i, f in enumerate(feats):
+        n = f.shape[-1]
+        out[i, ..., :n].copy_(f)
+        out[i, ..., n:].zero_()
+    return out, lengths
+
+
 class EmoDataModule(BaseLightningDataModule):
     """
     Lightning DataModule for EMO-DB dataset handling.
@@ -123,67 +505,123 @@ class EmoDataModule(BaseLightningDataModule):
     This class manages dataset splitting, batch creation, and dataloader configuration.
     It provides train and validation dataloaders with automatic padding for variable-length sequences.
 
+    When `shard_dir` is given, the module streams `train-*.tar` and `val-*.tar` shards
+    (see `write_emodb_shards`) through ShardedEmoDBDataset instead of listing `data_dir`.
+
+    With `compact=True`, raw waveforms travel from the workers as int16 (half the bytes of
+    float32) and are converted to float once per batch in `on_after_batch_transfer`, i.e.
+    after the batch has reached the model's device. Batches drawn from the dataloaders
+    outside of a Trainer must be converted with `dequantize`.
+
     Args:
         data_dir (str): Directory containing the WAV files
         batch_size (int, optional): Batch size for dataloaders. Defaults to 32
         transform (callable, optional): Transform to apply to the audio waveforms
         split_ratio (float, optional): Train/test split ratio. Defaults to 0.8
+        shard_dir (str, optional): Directory containing tar shards. Defaults to None (map-style dataset)
+        shuffle_buffer (int, optional): Sample shuffle buffer size for sharded training. Defaults to 1000
+        compact (bool, optional): Keep raw waveforms as int16 until they reach the model. Defaults to False
+        num_workers (int, optional): Number of DataLoader worker processes. Defaults to 19
+        pin_memory (bool, optional): Pin batches for faster host-to-GPU copies. Defaults to False
+        return_lengths (bool, optional): Yield (features, labels, lengths) batches. Defaults to False
     """
 
-    def __init__(self, data_dir, batch_size=32, transform=None, split_ratio=0.8):
+    def __init__(self, data_dir, batch_size=32, transform=None, split_ratio=0.8, shard_dir=None, shuffle_buffer=1000,
+                 compact=False, num_workers=19, pin_memory=False, return_lengths=False):
         super().__init__()
         self.data_dir = data_dir
         self.batch_size = batch_size
         self.transform = transform
         self.split_ratio = split_ratio
+        self.shard_dir = shard_dir
+        self.shuffle_buffer = shuffle_buffer
+        self.compact = compact
+        self.num_workers = num_workers
+        self.pin_memory = pin_memory
+        self.return_lengths = return_lengths
 
     def setup(self, stage=None):
         """
         Prepare train and test datasets.
         
         Splits the available data into train and test sets based on split_ratio.
-        Files are sorted for reproducibility before splitting.
+        Files are sorted for reproducibility before splitting. With `shard_dir`, the split
+        is the one baked into the shards.
+
+        Raises:
+            FileNotFoundError: If `shard_dir` has no train or val shard
+            ValueError: Under distributed training, if there are fewer shards than ranks x workers
         """
-        # List and sort files for reproducibility
-        all_files = sorted([f for f in os.listdir(self.data_dir) if f.endswith('.wav')])
-        n = len(all_files)
-        cutoff = int(n * self.split_ratio)
-        train_files = all_files[:cutoff]
-        test_files = all_files[cutoff:]
+        if self.shard_dir is not None:
+            self.train_ds = ShardedEmoDBDataset(os.path.join(self.shard_dir, "train-*.tar"), transform=self.transform,
+                                                shuffle=True, buffer_size=self.shuffle_buffer, compact=self.compact)
+            self.test_ds = ShardedEmoDBDataset(os.path.join(self.shard_dir, "val-*.tar"), transform=self.transform,
+                                               compact=self.compact)
+            world_size = self.train_ds.world_size
+            if world_size > 1:
+                n_slots = world_size * max(1, self.num_workers)
+                for ds in (self.train_ds, self.test_ds):
+                    if len(ds.shards) < n_slots:
+                        raise ValueError(f"{len(ds.shards)} shards cannot feed {world_size} ranks x "
+                                         f"{max(1, self.num_workers)} workers, write more, smaller shards")
+                    # Count once here so that the workers inherit the cached counts
+                    ds.sample_counts()
+            return
+
+        train_files, test_files = split_files(self.data_dir, self.split_ratio)
 
         # Create datasets with explicit file lists
-        self.train_ds = EmoDBDataset(self.data_dir, files_list=train_files, transform=self.transform)
-        self.test_ds = EmoDBDataset(self.data_dir, files_list=test_files, transform=self.transform)
+        self.train_ds = EmoDBDataset(self.data_dir, files_list=train_files, transform=self.transform,
+                                     compact=self.compact)
+        self.test_ds = EmoDBDataset(self.data_dir, files_list=test_files, transform=self.transform,
+                                    compact=self.compact)
 
     def pad_collate(self, batch):
         """
         Custom collate function for padding variable-length sequences in a batch.
 
+        Features are written once into a preallocated buffer (see `pad_batch`), keeping their
+        dtype, so compact int16 batches stay int16 until `on_after_batch_transfer`. Collated in
+        the main process (num_workers=0) with `pin_memory`, they are written to pinned memory directly.
+
         Args:
             batch: List of (features, label) tuples
 
         Returns:
-            tuple: (padded_features, labels)
+            tuple: (padded_features, labels) or (padded_features, labels, lengths) with `return_lengths`
                 - padded_features: Tensor with all sequences padded to the longest sequence length
                 - labels: Tensor of corresponding emotion labels
+                - lengths: Tensor of the original sequence lengths
         """
         feats, labels = zip(*batch)
-        # Find max time-length in batch
-        max_len = max(f.shape[-1] for f in feats)
-        # Pad each feature to max_len
-        padded = [F.pad(f, (0, max_len - f.shape[-1])) for f in feats]
-        # Stack and return
-        x = torch.stack(padded)
+        x, lengths = pad_batch(feats, pin_memory=self.pin_memory and torch.cuda.is_available())
         y = torch.tensor(labels, dtype=torch.long)
-        return x, y
+        return (x, y, lengths) if self.return_lengths else (x, y)
+
+    def on_after_batch_transfer(self, batch, dataloader_idx):
+        """Convert compact int16 waveforms to float32 once per batch, on the model's device."""
+        x, *rest = batch
+        if x.dtype == torch.int16:
+            x = dequantize(x)
+        return (x, *rest)
 
     def train_dataloader(self):
         """Returns the training data loader."""
+        if isinstance(self.train_ds, IterableDataset):
+            # Shuffling is done by the dataset itself, reseeded at every epoch by ShardEpochCallback
+            trainer = getattr(self, "trainer", None)
+            if trainer is not None:
+                self.train_ds.set_epoch(trainer.current_epoch)
+                if not any(isinstance(cb, ShardEpochCallback) and cb.dataset is self.train_ds
+                           for cb in trainer.callbacks):
+                    trainer.callbacks.append(ShardEpochCallback(self.train_ds))
+            return DataLoader(self.train_ds, batch_size=self.batch_size,
+                              collate_fn=self.pad_collate, num_workers=self.num_workers, pin_memory=self.pin_memory)
         return DataLoader(self.train_ds, batch_size=self.batch_size, shuffle=True, 
-                         collate_fn=self.pad_collate, num_workers=19)
+                         collate_fn=self.pad_collate, num_workers=self.num_workers, pin_memory=self.pin_memory)
 
     def val_dataloader(self):
         """Returns the validation data loader."""
         return DataLoader(self.test_ds, batch_size=self.batch_size, shuffle=False, 
-                         collate_fn=self.pad_collate, num_workers=19)
+                         collate_fn=self.pad_collate, num_workers=self.num_workers, pin_memory=self.pin_memory)
 
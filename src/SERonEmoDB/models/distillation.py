@@ -0,0 +1,397 @@
+"""
+Knowledge distillation of EmotionClassifier teachers into small CPU-deployable students.
+
+The teacher is run once over the training set and its logits are cached (in memory and
+optionally on disk), so student epochs never pay for a teacher forward pass. The on-disk
+cache records which files, teacher weights and transform produced it, and is recomputed
+when any of them changes.
+
+Classes:
+    TeacherLogitsDataset: Map-style dataset yielding (features, label, teacher_logits).
+    DistillationDataModule: EmoDataModule whose training set carries cached teacher logits.
+    DistillationModel: LightningModule training a student on soft targets plus hard labels.
+
+Functions:
+    load_teacher: Load a frozen teacher from a Lightning checkpoint.
+    cache_teacher_logits: Run a teacher once over a dataset.
+    evaluate_accuracy: Macro accuracy of a model over a dataloader.
+    tradeoff_report: Accuracy, parameters, FLOPs and CPU latency of several models.
+    run_distillation: End-to-end distillation from a teacher checkpoint.
+"""
+import hashlib
+import os
+import warnings
+import lightning as L
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import Dataset, DataLoader
+from torchmetrics import Accuracy
+from SERonEmoDB.contracts.base_model import BaseLightningModel
+from SERonEmoDB.data_ingest.data_ingest import EmoDataModule, EmoDBDataset, dequantize, split_files
+from SERonEmoDB.models.model import EmotionClassifier
+from SERonEmoDB.models.profiling import profile_model
+
+
+def load_teacher(checkpoint_path, model_class=EmotionClassifier) -> EmotionClassifier:
+    """
+    Load a trained teacher, e.g. `lightning_logs/version_5/checkpoints/*.ckpt`, frozen in eval mode.
+
+    Args:
+        checkpoint_path (str): Path to the Lightning checkpoint
+        model_class (type, optional): Class the checkpoint was trained with. Defaults to EmotionClassifier
+
+    Returns:
+        EmotionClassifier: The teacher on the CPU, with gradients disabled
+    """
+    teacher = model_class.load_from_checkpoint(checkpoint_path, map_location="cpu")
+    teacher.eval()
+    teacher.requires_grad_(False)
+    return teacher
+
+
+@torch.inference_mode()
+def cache_teacher_logits(teacher, dataset, batch_size=1, collate_fn=None, device="cpu") -> torch.Tensor:
+    """
+    Run `teacher` once over `dataset`, in order.
+
+    With the default `batch_size=1` every utterance is seen unpadded, so its logits do not
+    depend on which other clips it is batched with. Larger batches are faster but zero-pad
+    the shorter items, which changes their logits.
+
+    Args:
+        teacher (nn.Module): Trained model in eval mode
+        dataset (Dataset): Map-style dataset of (features, label)
+        batch_size (int, optional): Batch size of the teacher pass. Defaults to 1
+        collate_fn (callable, optional): Collate function producing (x, y, ...) batches
+        device (str, optional): Device of the teacher pass. Defaults to "cpu"
+
+    Returns:
+        torch.Tensor: Float32 logits of shape [len(dataset), n_classes]
+    """
+    teacher = teacher.to(device)
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=False, collate_fn=collate_fn)
+    logits = []
+    for batch in loader:
+        x = batch[0]
+        if x.dtype == torch.int16:
+            x = dequantize(x)
+        logits.append(teacher(x.to(device)).float().cpu())
+    return torch.cat(logits)
+
+
+def _teacher_fingerprint(teacher) -> str:
+    """SHA-256 of the teacher's parameters and buffers, identifying the checkpoint it was loaded from."""
+    digest = hashlib.sha256()
+    for name, tensor in sorted(teacher.state_dict().items()):
+        digest.update(name.encode())
+        digest.update(tensor.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _transform_name(transform) -> str:
+    """Stable name of a feature transform, e.g. "raw" or "MFCC40(40)"."""
+    if transform is None or isinstance(transform, nn.Identity):
+        return "raw"
+    return f"{type(transform).__name__}({getattr(transform, 'output_channels', '')})"
+
+
+class TeacherLogitsDataset(Dataset):
+    """
+    Wrap a map-style dataset so every item also carries its cached teacher logits.
+
+    Args:
+        dataset (Dataset): Map-style dataset of (features, label)
+        logits (torch.Tensor): Teacher logits of shape [len(dataset), n_classes]
+
+    Returns:
+        tuple: (features, label, teacher_logits)
+    """
+
+    def __init__(self, dataset, logits):
+        if len(dataset) != len(logits):
+            raise ValueError(f"Got {len(logits)} teacher logits for a dataset of {len(dataset)} items")
+        self.dataset = dataset
+        self.logits = logits
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx):
+        features, label = self.dataset[idx]
+        return features, label, self.logits[idx]
+
+
+class DistillationDataModule(EmoDataModule):
+    """
+    EmoDataModule whose training batches are (features, labels, [lengths,] teacher_logits).
+
+    The teacher logits are computed once over the training split, using `teacher_transform`
+    so that e.g. an MFCC teacher can supervise a raw-waveform student. With `cache_path`,
+    `prepare_data` computes them on global rank zero and saves them together with the training
+    files, a hash of the teacher weights, the teacher transform and the number of classes;
+    `setup` then only loads them on every rank, so `cache_path` must be visible to all nodes.
+    A cache is reused only if all of these match, and recomputed otherwise. Without
+    `cache_path`, or when `setup` runs without `prepare_data` and finds no valid cache, every
+    process computes the logits in memory and nothing is written. Validation batches are
+    unchanged. Only the map-style dataset is supported, since streamed shards have no stable
+    index to attach logits to.
+
+    Args:
+        data_dir (str): Directory containing the WAV files
+        teacher (nn.Module): Trained teacher in eval mode
+        teacher_transform (callable, optional): Transform of the teacher inputs. Defaults to the student's `transform`
+        cache_path (str, optional): File where the teacher logits are saved and loaded. Defaults to None
+        teacher_batch_size (int, optional): Batch size of the teacher pass, see `cache_teacher_logits`. Defaults to 1
+        **kwargs: Remaining EmoDataModule arguments (batch_size, transform, split_ratio, ...)
+
+    Raises:
+        ValueError: If `teacher` is None or `shard_dir` is given
+    """
+
+    def __init__(self, data_dir, teacher, teacher_transform=None, cache_path=None, teacher_batch_size=1, **kwargs):
+        super().__init__(data_dir, **kwargs)
+        if teacher is None:
+            raise ValueError("DistillationDataModule needs a teacher to validate or compute its logits")
+        if self.shard_dir is not None:
+            raise ValueError("DistillationDataModule needs the map-style dataset, shard_dir is not supported")
+        self.teacher = teacher
+        self.teacher_transform = teacher_transform
+        self.cache_path = cache_path
+        self.teacher_batch_size = teacher_batch_size
+        self.teacher_logits = None
+        # Written once for all nodes, by global rank zero
+        self.prepare_data_per_node = False
+
+    def prepare_data(self):
+        """Compute the teacher logits of the training split and save them to `cache_path`, unless already cached."""
+        if self.cache_path is None:
+            return
+        train_files, _ = split_files(self.data_dir, self.split_ratio)
+        metadata = self._cache_metadata(train_files)
+        if self._load_cached_logits(metadata) is None:
+            torch.save({"logits": self._compute_logits(train_files), **metadata}, self.cache_path)
+
+    def setup(self, stage=None):
+        """Prepare the datasets and attach the cached teacher logits to the training set."""
+        super().setup(stage)
+        if self.teacher_logits is None:
+            logits = None
+            if self.cache_path is not None:
+                logits = self._load_cached_logits(self._cache_metadata(self.train_ds.files))
+            self.teacher_logits = logits if logits is not None else self._compute_logits(self.train_ds.files)
+        self.train_ds = TeacherLogitsDataset(self.train_ds, self.teacher_logits)
+
+    def _teacher_transform(self):
+        return self.teacher_transform if self.teacher_transform is not None else self.transform
+
+    def _cache_metadata(self, files):
+        return {
+            "files": list(files),
+            "teacher": _teacher_fingerprint(self.teacher),
+            "transform": _transform_name(self._teacher_transform()),
+            "n_classes": self.teacher.hparams.n_classes,
+        }
+
+    def _load_cached_logits(self, metadata):
+        """Logits saved in `cache_path` if they were produced for `metadata`, else None."""
+        if not os.path.exists(self.cache_path):
+            return None
+        cached = torch.load(self.cache_path)
+        if isinstance(cached, dict) and all(cached.get(k) == v for k, v in metadata.items()):
+            return cached["logits"]
+        warnings.warn(f"Teacher logits in {self.cache_path} do not match this teacher and split, recomputing")
+        return None
+
+    def _compute_logits(self, files):
+        teacher_ds = EmoDBDataset(self.data_dir, files_list=files, transform=self._teacher_transform())
+        return cache_teacher_logits(self.teacher, teacher_ds, batch_size=self.teacher_batch_size,
+                                    collate_fn=self.pad_collate)
+
+    def pad_collate(self, batch):
+        """
+        Collate (features, label[, teacher_logits]) items.
+
+        Returns:
+            tuple: The EmoDataModule batch, followed by stacked teacher logits for training items
+        """
+        if len(batch[0]) == 2:
+            return super().pad_collate(batch)
+        feats, labels, teacher = zip(*batch)
+        return (*super().pad_collate(list(zip(feats, labels))), torch.stack(teacher))
+
+
+class DistillationModel(BaseLightningModel):
+    """
+    Train a student on the teacher's softened outputs plus the hard labels (Hinton et al., 2015).
+
+    loss = alpha * T^2 * KL(softmax(teacher / T) || softmax(student / T)) + (1 - alpha) * CE(student, y)
+
+    Training batches come from DistillationDataModule and end with the cached teacher logits;
+    validation batches are plain (x, y). After training, `student` is a regular
+    EmotionClassifier that can be saved and deployed on its own.
+
+    Args:
+        student (EmotionClassifier): Model to train, e.g. EmotionClassifier(hidden_channels=4)
+        temperature (float, optional): Softmax temperature T. Defaults to 4.0
+        alpha (float, optional): Weight of the distillation term. Defaults to 0.5
+        lr (float, optional): Learning rate for the Adam optimizer. Defaults to 1e-3
+    """
+
+    def __init__(self, student: EmotionClassifier, temperature: float = 4.0, alpha: float = 0.5, lr: float = 1e-3):
+        super().__init__()
+        self.save_hyperparameters(ignore=["student"])
+        self.student = student
+        self.accuracy = Accuracy(task="multiclass", num_classes=student.hparams.n_classes, average="macro")
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Forward pass of the student.
+
+        Args:
+            x (torch.Tensor): Input tensor of shape [batch_size, channels, time_steps]
+
+        Returns:
+            torch.Tensor: Logits tensor of shape [batch_size, n_classes]
+        """
+        return self.student(x)
+
+    def distillation_loss(self, logits, teacher_logits) -> torch.Tensor:
+        """KL divergence between temperature-softened teacher and student distributions, scaled by T^2."""
+        t = self.hparams.temperature
+        kl = F.kl_div(F.log_softmax(logits / t, dim=-1), F.log_softmax(teacher_logits / t, dim=-1),
+                      reduction="batchmean", log_target=True)
+        return kl * t * t
+
+    def training_step(self, batch, batch_idx):
+        """
+        Performs a single training step.
+
+        Args:
+            batch (tuple): (x, y, [lengths,] teacher_logits)
+            batch_idx (int): Index of the current batch
+
+        Returns:
+            torch.Tensor: Computed loss value
+        """
+        x, y, teacher_logits = batch[0], batch[1], batch[-1]
+        logits = self(x)
+        kd_loss = self.distillation_loss(logits, teacher_logits)
+        ce_loss = F.cross_entropy(logits, y)
+        loss = self.hparams.alpha * kd_loss + (1 - self.hparams.alpha) * ce_loss
+        preds = logits.argmax(dim=-1)
+        acc = self.accuracy(preds, y)
+        self.log('train_loss', loss, prog_bar=True)
+        self.log('train_kd_loss', kd_loss)
+        self.log('train_acc', acc, prog_bar=True)
+        return loss
+
+    def validation_step(self, batch, batch_idx):
+        """
+        Performs a single validation step on the hard labels.
+
+        Args:
+            batch (tuple): (x, y[, lengths])
+            batch_idx (int): Index of the current batch
+        """
+        x, y = batch[0], batch[1]
+        logits = self(x)
+        loss = F.cross_entropy(logits, y)
+        preds = logits.argmax(dim=-1)
+        acc = self.accuracy(preds, y)
+        self.log('val_loss', loss, prog_bar=True)
+        self.log('val_acc', acc, prog_bar=True)
+
+    def configure_optimizers(self):
+        """
+        Configures the optimizer for training.
+
+        Returns:
+            torch.optim.Optimizer: Adam optimizer over the student parameters
+        """
+        return torch.optim.Adam(self.student.parameters(), lr=self.hparams.lr)
+
+
+@torch.inference_mode()
+def evaluate_accuracy(model, dataloader) -> float:
+    """
+    Macro accuracy of `model` over `dataloader`, matching the `val_acc` metric.
+
+    Args:
+        model (EmotionClassifier): Model to evaluate (run on the CPU)
+        dataloader (DataLoader): Loader of (x, y, ...) batches
+
+    Returns:
+        float: Macro-averaged accuracy
+    """
+    was_training = model.training
+    model.eval()
+    metric = Accuracy(task="multiclass", num_classes=model.hparams.n_classes, average="macro")
+    for batch in dataloader:
+        x, y = batch[0], batch[1]
+        if x.dtype == torch.int16:
+            x = dequantize(x)
+        metric.update(model(x).argmax(dim=-1), y)
+    model.train(was_training)
+    return metric.compute().item()
+
+
+def tradeoff_report(candidates) -> list[dict]:
+    """
+    Report the accuracy-latency trade-off of several models.
+
+    FLOPs and CPU latency are measured on a single input shaped like the first batch of the
+    model's dataloader, so MFCC and raw-waveform models are each profiled on their own inputs.
+
+    Args:
+        candidates (dict): Mapping name -> (model, dataloader); each model is evaluated on its
+            own dataloader so teacher and student may use different transforms
+
+    Returns:
+        list: One dict per model with keys name, accuracy, params, flops and latency_ms
+    """
+    rows = []
+    for name, (model, dataloader) in candidates.items():
+        x = next(iter(dataloader))[0]
+        row = {"name": name, "accuracy": evaluate_accuracy(model, dataloader)}
+        row.update(profile_model(model, (1, *x.shape[1:])))
+        rows.append(row)
+    return rows
+
+
+def run_distillation(teacher_checkpoint, data_dir, student, transform=None, teacher_transform=None,
+                     cache_path=None, max_epochs=10, temperature=4.0, alpha=0.5, trainer_kwargs=None,
+                     **datamodule_kwargs):
+    """
+    Distill a teacher checkpoint into `student` and report the accuracy-latency trade-off.
+
+    Args:
+        teacher_checkpoint (str): Path to the teacher's Lightning checkpoint
+        data_dir (str): Directory containing the WAV files
+        student (EmotionClassifier): Student to train
+        transform (callable, optional): Transform of the student inputs
+        teacher_transform (callable, optional): Transform of the teacher inputs. Defaults to `transform`
+        cache_path (str, optional): File where the teacher logits are cached. Defaults to None
+        max_epochs (int, optional): Number of student epochs. Defaults to 10
+        temperature (float, optional): Softmax temperature. Defaults to 4.0
+        alpha (float, optional): Weight of the distillation term. Defaults to 0.5
+        trainer_kwargs (dict, optional): Extra arguments of the Lightning Trainer. Defaults to None
+        **datamodule_kwargs: Remaining EmoDataModule arguments (batch_size, split_ratio, ...)
+
+    Returns:
+        tuple: (trained student, tradeoff_report rows for the teacher and the student)
+    """
+    teacher = load_teacher(teacher_checkpoint)
+    dm = DistillationDataModule(data_dir, teacher, teacher_transform=teacher_transform, cache_path=cache_path,
+                                transform=transform, **datamodule_kwargs)
+    model = DistillationModel(student, temperature=temperature, alpha=alpha, lr=student.hparams.lr)
+    L.Trainer(max_epochs=max_epochs, **(trainer_kwargs or {})).fit(model, datamodule=dm)
+
+    teacher_dm = EmoDataModule(data_dir, transform=teacher_transform if teacher_transform is not None else transform,
+                               **datamodule_kwargs)
+    teacher_dm.setup()
+    report = tradeoff_report({
+        "teacher": (teacher, teacher_dm.val_dataloader()),
+        "student": (student, dm.val_dataloader()),
+    })
+    return student, report
@@ -0,0 +1,102 @@
+"""
+Building blocks for the efficient raw-waveform front-ends in `SERonEmoDB.models.model`.
+
+Classes:
+    SincConv1d: Learnable band-pass filterbank (SincNet) applied with a stride.
+    LogMagnitude: Log-compressed magnitude of filterbank outputs.
+
+Functions:
+    separable_block: Depthwise-separable 1D convolution block.
+"""
+import math
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+class SincConv1d(nn.Module):
+    """
+    Learnable band-pass filterbank from SincNet (Ravanelli & Bengio, 2018).
+
+    Each output channel is a windowed band-pass sinc filter parametrised only by its two
+    cut-off frequencies, so the layer has 2 parameters per filter instead of `kernel_size`.
+    Filters are initialised on the mel scale.
+
+    Args:
+        out_channels (int): Number of filters
+        kernel_size (int): Filter length in samples (made odd if even)
+        stride (int, optional): Convolution stride. Defaults to 1
+        sample_rate (int, optional): Sampling rate of the input. Defaults to 16000
+        min_low_hz (float, optional): Minimum low cut-off frequency. Defaults to 50
+        min_band_hz (float, optional): Minimum bandwidth. Defaults to 50
+    """
+
+    def __init__(self, out_channels, kernel_size, stride=1, sample_rate=16000, min_low_hz=50, min_band_hz=50):
+        super().__init__()
+        self.out_channels = out_channels
+        self.kernel_size = kernel_size + 1 if kernel_size % 2 == 0 else kernel_size
+        self.stride = stride
+        self.sample_rate = sample_rate
+        self.min_low_hz = min_low_hz
+        self.min_band_hz = min_band_hz
+
+        # Mel-spaced initial cut-off frequencies
+        high_hz = sample_rate / 2 - (min_low_hz + min_band_hz)
+        mel = torch.linspace(self._to_mel(30.0), self._to_mel(high_hz), out_channels + 1)
+        hz = 700 * (10 ** (mel / 2595) - 1)
+        self.low_hz_ = nn.Parameter(hz[:-1].view(-1, 1))
+        self.band_hz_ = nn.Parameter(torch.diff(hz).view(-1, 1))
+
+        # Left half of the (symmetric) filters: Hamming window and time axis
+        half = self.kernel_size // 2
+        t = torch.linspace(0, half - 1, steps=half)
+        self.register_buffer("window_", 0.54 - 0.46 * torch.cos(2 * math.pi * t / self.kernel_size))
+        self.register_buffer("n_", 2 * math.pi * torch.arange(-half, 0).view(1, -1) / sample_rate)
+
+    @staticmethod
+    def _to_mel(hz):
+        return 2595 * math.log10(1 + hz / 700)
+
+    def filters(self) -> torch.Tensor:
+        """Return the current filterbank of shape [out_channels, 1, kernel_size]."""
+        low = self.min_low_hz + torch.abs(self.low_hz_)
+        high = torch.clamp(low + self.min_band_hz + torch.abs(self.band_hz_), self.min_low_hz, self.sample_rate / 2)
+        band = (high - low)[:, 0]
+
+        left = (torch.sin(high @ self.n_) - torch.sin(low @ self.n_)) / (self.n_ / 2) * self.window_
+        center = 2 * band.view(-1, 1)
+        right = torch.flip(left, dims=[1])
+        bank = torch.cat([left, center, right], dim=1) / (2 * band[:, None])
+        return bank.view(self.out_channels, 1, self.kernel_size)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Args:
+            x (torch.Tensor): Waveform of shape [batch_size, 1, time_steps]
+
+        Returns:
+            torch.Tensor: Filter responses of shape [batch_size, out_channels, time_steps // stride]
+        """
+        return F.conv1d(x, self.filters(), stride=self.stride, padding=self.kernel_size // 2)
+
+
+class LogMagnitude(nn.Module):
+    """Log-compressed magnitude, log(1 + |x|), applied to filterbank outputs."""
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return torch.log1p(torch.abs(x))
+
+
+def separable_block(in_channels, out_channels, kernel_size=5):
+    """
+    Depthwise-separable 1D convolution block: depthwise conv, pointwise conv, BatchNorm, ReLU.
+
+    Costs about `in_channels * (kernel_size + out_channels)` MACs per frame instead of
+    `in_channels * out_channels * kernel_size` for a full convolution.
+    """
+    return nn.Sequential(
+        nn.Conv1d(in_channels, in_channels, kernel_size, padding=kernel_size // 2, groups=in_channels, bias=False),
+        nn.Conv1d(in_channels, out_channels, kernel_size=1, bias=False),
+        nn.BatchNorm1d(out_channels),
+        nn.ReLU(),
+    )
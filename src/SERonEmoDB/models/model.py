@@ -4,6 +4,8 @@ import torch.nn.functional as F
 import lightning as pl
 from torchmetrics import Accuracy
 from SERonEmoDB.contracts.base_model import BaseLightningModel
+from SERonEmoDB.models.layers import LogMagnitude, SincConv1d, separable_block
+from SERonEmoDB.models.profiling import profile_model
 
 class EmotionClassifier(BaseLightningModel):
     """
@@ -22,28 +24,43 @@ class EmotionClassifier(BaseLightningModel):
         lr (float, optional): Learning rate for the Adam optimizer. Defaults to 1e-3.
         input_channels (int, optional): Number of input channels (1 for raw waveform, n for MFCCs). 
             Defaults to 1.
+        hidden_channels (int, optional): Width of the first conv layer, the second uses twice as many.
+            Smaller values give the tiny students used for distillation. Defaults to 16.
 
     Attributes:
         accuracy: Multiclass accuracy metric using macro averaging
         conv: Sequential container of convolutional layers for feature extraction
         classifier: Linear layer for final classification
+
+    Subclasses only override `_build_conv` to swap the feature extractor.
     """
-    def __init__(self, n_classes: int = 7, lr: float = 1e-3, input_channels: int = 1):
+    def __init__(self, n_classes: int = 7, lr: float = 1e-3, input_channels: int = 1, hidden_channels: int = 16):
         super().__init__()
         self.save_hyperparameters()
         self.accuracy = Accuracy(task="multiclass", num_classes=n_classes, average="macro")
         
         # Convolutional feature extractor
-        self.conv = nn.Sequential(
-            nn.Conv1d(self.hparams.input_channels, 16, kernel_size=3, padding=1),
+        self.conv, out_channels = self._build_conv()
+
+        self.classifier = nn.Linear(out_channels, self.hparams.n_classes)
+
+    def _build_conv(self) -> tuple[nn.Sequential, int]:
+        """
+        Build the convolutional feature extractor.
+
+        Returns:
+            tuple: (feature extractor ending in a [batch_size, C, 1] output, number of channels C)
+        """
+        hidden = self.hparams.hidden_channels
+        conv = nn.Sequential(
+            nn.Conv1d(self.hparams.input_channels, hidden, kernel_size=3, padding=1),
             nn.ReLU(),
             nn.MaxPool1d(kernel_size=2),
-            nn.Conv1d(16, 32, kernel_size=3, padding=1),
+            nn.Conv1d(hidden, 2 * hidden, kernel_size=3, padding=1),
             nn.ReLU(),
             nn.AdaptiveMaxPool1d(1),  # Collapse time dim -> 1
         )
-
-        self.classifier = nn.Linear(32, self.hparams.n_classes)
+        return conv, 2 * hidden
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         """
@@ -64,13 +81,13 @@ class EmotionClassifier(BaseLightningModel):
         Performs a single training step.
 
         Args:
-            batch (tuple): Tuple containing input tensor and target labels
+            batch (tuple): Tuple containing input tensor, target labels and optionally lengths
             batch_idx (int): Index of the current batch
 
         Returns:
             torch.Tensor: Computed loss value
         """
-        x, y = batch
+        x, y = batch[0], batch[1]
         logits = self(x)
         loss = F.cross_entropy(logits, y)
         preds = logits.argmax(dim=-1)
@@ -84,10 +101,10 @@ class EmotionClassifier(BaseLightningModel):
         Performs a single validation step.
 
         Args:
-            batch (tuple): Tuple containing input tensor and target labels
+            batch (tuple): Tuple containing input tensor, target labels and optionally lengths
             batch_idx (int): Index of the current batch
         """
-        x, y = batch
+        x, y = batch[0], batch[1]
         logits = self(x)
         loss = F.cross_entropy(logits, y)
         preds = logits.argmax(dim=-1)
@@ -104,4 +121,111 @@ class EmotionClassifier(BaseLightningModel):
         """
         return torch.optim.Adam(self.parameters(), lr=self.hparams.lr)
 
+    def efficiency_report(self, input_length: int = 48000, n_runs: int = 20) -> dict:
+        """
+        Report the cost of one forward pass on a single input of `input_length` time steps.
+
+        Args:
+            input_length (int, optional): Number of time steps. Defaults to 3 s of 16 kHz audio
+            n_runs (int, optional): Number of timed runs for the latency. Defaults to 20
+
+        Returns:
+            dict: {"params": int, "flops": int, "latency_ms": float} measured on the CPU
+        """
+        return profile_model(self, (1, self.hparams.input_channels, input_length), n_runs=n_runs)
+
+
+def _separable_backbone(width: int) -> list[nn.Module]:
+    """Depthwise-separable stack shared by the raw-waveform variants: width -> 2*width -> 4*width -> 4*width."""
+    return [
+        separable_block(width, 2 * width),
+        nn.MaxPool1d(kernel_size=2),
+        separable_block(2 * width, 4 * width),
+        nn.MaxPool1d(kernel_size=2),
+        separable_block(4 * width, 4 * width),
+        nn.AdaptiveMaxPool1d(1),  # Collapse time dim -> 1
+    ]
+
+
+class StridedEmotionClassifier(EmotionClassifier):
+    """
+    EmotionClassifier variant for raw waveforms with a strided convolutional front-end.
+
+    A learnable Conv1d with a 2 ms kernel and a 1 ms stride turns the 16 kHz waveform into
+    a 1 kHz frame sequence, which is pooled to 250 Hz before a stack of depthwise-separable
+    blocks. At 3 s of audio this costs about 10.7x fewer FLOPs than EmotionClassifier on raw
+    input (see `efficiency_report`).
+
+    Experimental: only the compute reduction is verified. Its val_acc has not been compared
+    with EmotionClassifier yet; use `SERonEmoDB.models.distillation.tradeoff_report` on
+    trained checkpoints before relying on it.
+
+    Args:
+        n_classes (int, optional): Number of emotion classes to predict. Defaults to 7.
+        lr (float, optional): Learning rate for the Adam optimizer. Defaults to 1e-3.
+        input_channels (int, optional): Number of input channels. Defaults to 1 (raw waveform).
+        width (int, optional): Number of front-end filters; the backbone uses up to 4x this. Defaults to 16.
+        stride (int, optional): Front-end stride in samples. Defaults to 16.
+    """
+    def __init__(self, n_classes: int = 7, lr: float = 1e-3, input_channels: int = 1, width: int = 16,
+                 stride: int = 16):
+        super().__init__(n_classes=n_classes, lr=lr, input_channels=input_channels)
+
+    def _build_conv(self) -> tuple[nn.Sequential, int]:
+        width, stride = self.hparams.width, self.hparams.stride
+        conv = nn.Sequential(
+            nn.Conv1d(self.hparams.input_channels, width, kernel_size=2 * stride, stride=stride,
+                      padding=stride // 2, bias=False),
+            nn.BatchNorm1d(width),
+            nn.ReLU(),
+            nn.MaxPool1d(kernel_size=4),
+            *_separable_backbone(width),
+        )
+        return conv, 4 * width
+
 
+class SincEmotionClassifier(EmotionClassifier):
+    """
+    EmotionClassifier variant for raw waveforms with a SincNet filterbank front-end.
+
+    A SincConv1d learns the cut-off frequencies of mel-initialised band-pass filters. Its
+    outputs are sampled at 2 kHz (stride 8), rectified and log-compressed, then low-pass
+    filtered and decimated by an average pool to a 125 Hz envelope (8 ms hop), which feeds the
+    same depthwise-separable stack as StridedEmotionClassifier. Decimating after the magnitude
+    rather than in the filterbank stride samples the filter outputs at 2 kHz instead of
+    500 Hz, which greatly reduces the aliasing of their envelopes. At 3 s of audio this costs about 13x fewer FLOPs than EmotionClassifier on raw
+    input (see `efficiency_report`).
+
+    Experimental: only the compute reduction is verified. Its val_acc has not been compared
+    with EmotionClassifier yet; use `SERonEmoDB.models.distillation.tradeoff_report` on
+    trained checkpoints before relying on it.
+
+    Args:
+        n_classes (int, optional): Number of emotion classes to predict. Defaults to 7.
+        lr (float, optional): Learning rate for the Adam optimizer. Defaults to 1e-3.
+        input_channels (int, optional): Must be 1, the filterbank works on raw waveforms only.
+        width (int, optional): Number of band-pass filters; the backbone uses up to 4x this. Defaults to 12.
+        kernel_size (int, optional): Filter length in samples. Defaults to 33 (~2 ms).
+        stride (int, optional): Filterbank stride in samples. Defaults to 8.
+        pool (int, optional): Decimation of the average pool after the magnitude. Defaults to 16.
+
+    Raises:
+        ValueError: If `input_channels` is not 1
+    """
+    def __init__(self, n_classes: int = 7, lr: float = 1e-3, input_channels: int = 1, width: int = 12,
+                 kernel_size: int = 33, stride: int = 8, pool: int = 16):
+        if input_channels != 1:
+            raise ValueError(f"SincEmotionClassifier expects raw waveforms (input_channels=1), got {input_channels}")
+        super().__init__(n_classes=n_classes, lr=lr, input_channels=input_channels)
+
+    def _build_conv(self) -> tuple[nn.Sequential, int]:
+        width, pool = self.hparams.width, self.hparams.pool
+        conv = nn.Sequential(
+            SincConv1d(width, kernel_size=self.hparams.kernel_size, stride=self.hparams.stride),
+            LogMagnitude(),
+            # Overlapping windows low-pass the envelopes before decimating them
+            nn.AvgPool1d(kernel_size=2 * pool, stride=pool, padding=pool // 2),
+            nn.BatchNorm1d(width),
+            *_separable_backbone(width),
+        )
+        return conv, 4 * width
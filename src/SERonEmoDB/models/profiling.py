@@ -0,0 +1,104 @@
+"""
+Compute and latency profiling for the models in `SERonEmoDB.models`.
+
+Functions:
+    count_parameters: Number of trainable parameters.
+    count_flops: FLOPs of one forward pass (convolutions and linear layers).
+    measure_latency: Median CPU latency of one forward pass.
+    profile_model: All of the above in one dictionary.
+"""
+import statistics
+import time
+import torch
+import torch.nn as nn
+from SERonEmoDB.models.layers import SincConv1d
+
+
+def count_parameters(model: nn.Module) -> int:
+    """Return the number of trainable parameters of `model`."""
+    return sum(p.numel() for p in model.parameters() if p.requires_grad)
+
+
+def _macs(module, inputs, output):
+    """Multiply-accumulates of one call of a supported layer, 0 for anything else."""
+    if isinstance(module, nn.Conv1d):
+        return output.numel() * (module.in_channels // module.groups) * module.kernel_size[0]
+    if isinstance(module, SincConv1d):
+        return output.numel() * module.kernel_size
+    if isinstance(module, nn.Linear):
+        return output.numel() * module.in_features
+    return 0
+
+
+def count_flops(model: nn.Module, input_shape=(1, 1, 48000)) -> int:
+    """
+    Count the FLOPs (2 x multiply-accumulates) of one forward pass.
+
+    Only convolutions, SincConv1d and linear layers are counted; activations, pooling and
+    normalisation are negligible in comparison.
+
+    Args:
+        model (nn.Module): Model to profile
+        input_shape (tuple, optional): Input shape [B, C, T]. Defaults to 3 s of 16 kHz audio
+
+    Returns:
+        int: Number of FLOPs
+    """
+    total = 0
+
+    def hook(module, inputs, output):
+        nonlocal total
+        total += _macs(module, inputs, output)
+
+    handles = [m.register_forward_hook(hook) for m in model.modules()]
+    was_training = model.training
+    model.eval()
+    try:
+        with torch.inference_mode():
+            model(torch.zeros(input_shape))
+    finally:
+        for h in handles:
+            h.remove()
+        model.train(was_training)
+    return 2 * total
+
+
+def measure_latency(model: nn.Module, input_shape=(1, 1, 48000), n_runs=20, warmup=3) -> float:
+    """
+    Measure the median CPU latency of one forward pass in milliseconds.
+
+    Args:
+        model (nn.Module): Model to profile (its device is left unchanged; pass a CPU model)
+        input_shape (tuple, optional): Input shape [B, C, T]. Defaults to 3 s of 16 kHz audio
+        n_runs (int, optional): Number of timed runs. Defaults to 20
+        warmup (int, optional): Number of untimed warm-up runs. Defaults to 3
+
+    Returns:
+        float: Median latency in milliseconds
+    """
+    x = torch.randn(input_shape)
+    was_training = model.training
+    model.eval()
+    times = []
+    with torch.inference_mode():
+        for i in range(warmup + n_runs):
+            start = time.perf_counter()
+            model(x)
+            if i >= warmup:
+                times.append((time.perf_counter() - start) * 1e3)
+    model.train(was_training)
+    return statistics.median(times)
+
+
+def profile_model(model: nn.Module, input_shape=(1, 1, 48000), n_runs=20) -> dict:
+    """
+    Report parameters, FLOPs and measured CPU latency of `model`.
+
+    Returns:
+        dict: {"params": int, "flops": int, "latency_ms": float}
+    """
+    return {
+        "params": count_parameters(model),
+        "flops": count_flops(model, input_shape),
+        "latency_ms": measure_latency(model, input_shape, n_runs=n_runs),
+    }
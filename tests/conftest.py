@@ -0,0 +1,19 @@
+import torch
+import torchaudio
+import pytest
+
+
+def create_dummy_wav(path):
+    """Helper to create a 1-second random WAV at 16 kHz."""
+    waveform = torch.randn(1, 16000)
+    torchaudio.save(str(path), waveform, 16000, format="wav")
+
+
+@pytest.fixture
+def tmp_emodb(tmp_path):
+    """Creates a temporary EMODB-like directory with a few WAV files."""
+    emotions = ['W', 'L', 'N']  # anger, boredom, neutral
+    for emo in emotions:
+        fname = f"01a01{emo}a.wav"
+        create_dummy_wav(tmp_path / fname)
+    return tmp_path
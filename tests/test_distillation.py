@@ -0,0 +1,105 @@
+import lightning as L
+import torch
+import pytest
+
+from SERonEmoDB.feature_extraction.feature_extraction import TRANSFORMS
+from SERonEmoDB.models import distillation
+from SERonEmoDB.models.distillation import (
+    DistillationDataModule, DistillationModel, load_teacher, run_distillation, tradeoff_report,
+)
+from SERonEmoDB.models.model import EmotionClassifier
+
+
+def save_checkpoint(model, path):
+    """Write a minimal Lightning checkpoint of `model`."""
+    torch.save({
+        "state_dict": model.state_dict(),
+        "hyper_parameters": dict(model.hparams),
+        "pytorch-lightning_version": L.__version__,
+    }, path)
+
+
+def test_teacher_logits_cached_once(tmp_emodb, tmp_path_factory, monkeypatch):
+    """
+    An MFCC teacher must supervise a raw student through cached logits:
+    • prepare_data writes the cache and training batches end with teacher logits [B, n_classes]
+    • a second data module with the same teacher reuses the on-disk cache
+    • a different teacher invalidates it
+    • setup alone never writes the cache
+    """
+    teacher = EmotionClassifier(input_channels=40).eval()
+    cache_dir = tmp_path_factory.mktemp("cache")
+    cache_path = str(cache_dir / "teacher_logits.pt")
+    kwargs = dict(teacher_transform=TRANSFORMS["mfcc"], cache_path=cache_path, split_ratio=0.5, num_workers=0)
+    dm = DistillationDataModule(str(tmp_emodb), teacher, **kwargs)
+    dm.prepare_data()
+    assert (cache_dir / "teacher_logits.pt").exists()
+    dm.setup()
+    assert dm.teacher_logits.shape == (1, 7)
+
+    x, y, teacher_logits = next(iter(dm.train_dataloader()))
+    assert x.shape[:2] == (1, 1) and teacher_logits.shape == (1, 7)
+
+    with monkeypatch.context() as m:
+        m.setattr(distillation, "cache_teacher_logits", lambda *args, **kwargs: pytest.fail("logits recomputed"))
+        reloaded = DistillationDataModule(str(tmp_emodb), teacher, **kwargs)
+        reloaded.prepare_data()
+        reloaded.setup()
+    assert torch.equal(reloaded.teacher_logits, dm.teacher_logits)
+
+    other = DistillationDataModule(str(tmp_emodb), EmotionClassifier(input_channels=40).eval(), **kwargs)
+    with pytest.warns(UserWarning):
+        other.prepare_data()
+    with monkeypatch.context() as m:
+        m.setattr(distillation, "cache_teacher_logits", lambda *args, **kwargs: pytest.fail("logits recomputed"))
+        other.setup()
+    assert not torch.equal(other.teacher_logits, dm.teacher_logits)
+
+    kwargs["cache_path"] = str(cache_dir / "setup_only.pt")
+    setup_only = DistillationDataModule(str(tmp_emodb), teacher, **kwargs)
+    setup_only.setup()
+    assert torch.equal(setup_only.teacher_logits, dm.teacher_logits)
+    assert not (cache_dir / "setup_only.pt").exists()
+
+
+def test_distillation_training_step_and_report(tmp_emodb):
+    student = EmotionClassifier(input_channels=1, hidden_channels=4)
+    model = DistillationModel(student)
+
+    x = torch.randn(2, 1, 16000)
+    y = torch.zeros(2, dtype=torch.long)
+    loss = model.training_step((x, y, torch.randn(2, 7)), batch_idx=0)
+    assert loss.dim() == 0 and torch.isfinite(loss)
+
+    dm = DistillationDataModule(str(tmp_emodb), EmotionClassifier().eval(), split_ratio=0.5, num_workers=0)
+    dm.setup()
+    rows = tradeoff_report({"student": (student, dm.val_dataloader())})
+    assert set(rows[0]) == {"name", "accuracy", "params", "flops", "latency_ms"}
+    assert 0.0 <= rows[0]["accuracy"] <= 1.0
+
+
+def test_load_teacher_roundtrip(tmp_path):
+    teacher = EmotionClassifier(input_channels=40)
+    save_checkpoint(teacher, tmp_path / "teacher.ckpt")
+
+    loaded = load_teacher(str(tmp_path / "teacher.ckpt"))
+    assert loaded.hparams.input_channels == 40
+    assert not loaded.training
+    assert not any(p.requires_grad for p in loaded.parameters())
+    for key, value in teacher.state_dict().items():
+        assert torch.equal(loaded.state_dict()[key], value)
+
+
+def test_run_distillation(tmp_emodb, tmp_path_factory):
+    ckpt_dir = tmp_path_factory.mktemp("ckpt")
+    save_checkpoint(EmotionClassifier(input_channels=40), ckpt_dir / "teacher.ckpt")
+
+    student, rows = run_distillation(
+        str(ckpt_dir / "teacher.ckpt"), str(tmp_emodb), EmotionClassifier(input_channels=1, hidden_channels=4),
+        teacher_transform=TRANSFORMS["mfcc"], max_epochs=1, split_ratio=0.5, batch_size=1, num_workers=0,
+        trainer_kwargs=dict(default_root_dir=str(ckpt_dir), logger=False, enable_checkpointing=False,
+                            enable_progress_bar=False, accelerator="cpu"),
+    )
+    assert isinstance(student, EmotionClassifier)
+    assert [row["name"] for row in rows] == ["teacher", "student"]
+    assert rows[1]["params"] < rows[0]["params"]
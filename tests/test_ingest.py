@@ -1,24 +1,17 @@
+import tarfile
+from types import SimpleNamespace
+
 import torch
 import torchaudio
 import pytest
+import torch.nn.functional as F
 
-from SERonEmoDB.data_ingest.data_ingest import EmoDBDataset, EmoDataModule, EMOTION_MAP
+from SERonEmoDB.data_ingest.data_ingest import (
+    EmoDBDataset, EmoDataModule, EMOTION_MAP, ShardedEmoDBDataset, ShardEpochCallback, write_shards,
+    write_emodb_shards, pad_batch,
+)
 from SERonEmoDB.feature_extraction.feature_extraction import TRANSFORMS
-
-def create_dummy_wav(path):
-    """Helper to create a 1-second random WAV at 16 kHz."""
-    waveform = torch.randn(1, 16000)
-    torchaudio.save(str(path), waveform, 16000, format="wav")
-
-
-@pytest.fixture
-def tmp_emodb(tmp_path):
-    """Creates a temporary EMODB-like directory with a few WAV files."""
-    emotions = ['W', 'L', 'N']  # anger, boredom, neutral
-    for emo in emotions:
-        fname = f"01a01{emo}a.wav"
-        create_dummy_wav(tmp_path / fname)
-    return tmp_path
+from SERonEmoDB.models.model import EmotionClassifier
 
 
 def test_dataset_basic(tmp_emodb):
@@ -56,3 +49,143 @@ def test_datamodule_split_and_loaders(tmp_emodb, tx_name, tx):
     x, y = next(iter(dm.train_dataloader()))
     assert x.ndim == 3 and y.ndim == 1, f"{tx_name}: Ta cần Input Tensor có shape [B, C, T] và Input Labels có shape [B]"
     assert torch.isfinite(x).all(),              f"{tx_name}: NaN/Inf in batch"
+
+
+def test_sharded_dataset_roundtrip(tmp_emodb, tmp_path_factory):
+    """Samples written to shards must stream back with the same labels, once each."""
+    shard_dir = tmp_path_factory.mktemp("shards")
+    shards = write_shards(str(tmp_emodb), str(shard_dir), samples_per_shard=2)
+    assert len(shards) == 2
+
+    for shuffle in (False, True):
+        ds = ShardedEmoDBDataset(shards, shuffle=shuffle, buffer_size=2)
+        samples = list(ds)
+        assert len(samples) == 3
+        labels = sorted(label for _, label in samples)
+        assert labels == sorted(EMOTION_MAP[e] for e in ['W', 'L', 'N'])
+        for features, _ in samples:
+            assert features.ndim == 2 and features.size(0) == 1
+
+
+def test_datamodule_sharded(tmp_emodb, tmp_path_factory):
+    """EmoDataModule must stream the same [B, C, T] batches from shards."""
+    shard_dir = tmp_path_factory.mktemp("shards")
+    write_emodb_shards(str(tmp_emodb), str(shard_dir), split_ratio=0.5)
+    dm = EmoDataModule(str(tmp_emodb), batch_size=1, shard_dir=str(shard_dir))
+    dm.setup()
+
+    x, y = next(iter(dm.train_dataloader()))
+    assert x.ndim == 3 and y.ndim == 1
+    assert sum(1 for _ in dm.val_dataloader()) == 2
+
+
+@pytest.fixture
+def tmp_shards(tmp_path_factory):
+    """Eight clips of distinct lengths (1000 + i samples) packed two per shard."""
+    wav_dir = tmp_path_factory.mktemp("wavs")
+    for i in range(8):
+        torchaudio.save(str(wav_dir / f"{i:02d}a01Wa.wav"), torch.randn(1, 1000 + i) * 0.1, 16000, format="wav")
+    return write_shards(str(wav_dir), str(tmp_path_factory.mktemp("shards")), samples_per_shard=2)
+
+
+def test_sharded_epochs_reshuffle(tmp_shards):
+    """Consecutive epochs, advanced by ShardEpochCallback, must see the same samples in a different order."""
+    ds = ShardedEmoDBDataset(tmp_shards, shuffle=True, buffer_size=2)
+    callback = ShardEpochCallback(ds)
+    orders = []
+    for epoch in range(2):
+        callback.on_train_epoch_start(SimpleNamespace(current_epoch=epoch), None)
+        orders.append([features.shape[-1] for features, _ in ds])
+    assert sorted(orders[0]) == sorted(orders[1]) == list(range(1000, 1008))
+    assert orders[0] != orders[1]
+
+
+def test_sharded_ranks_yield_equal_counts(tmp_shards):
+    """With 2 ranks and an odd shard count, both ranks must yield the same number of samples."""
+    shards = tmp_shards[:3]  # 3 shards of 2 samples: rank 0 owns 2 shards, rank 1 owns 1
+    counts = [sum(1 for _ in ShardedEmoDBDataset(shards, rank=rank, world_size=2)) for rank in range(2)]
+    assert counts == [2, 2]
+
+
+def test_sharded_rank_from_env(tmp_shards, monkeypatch):
+    """Without a process group, the rank and world size come from the launcher's environment."""
+    monkeypatch.setenv("RANK", "1")
+    monkeypatch.setenv("WORLD_SIZE", "2")
+    ds = ShardedEmoDBDataset(tmp_shards)
+    assert (ds.rank, ds.world_size) == (1, 2)
+    assert sum(1 for _ in ds) == 4
+
+
+def test_sharded_dataset_errors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ShardedEmoDBDataset(str(tmp_path / "missing-*.tar"))
+
+    # A sample whose label member is missing must be reported with its shard and key
+    torchaudio.save(str(tmp_path / "01a01Wa.wav"), torch.randn(1, 16000), 16000, format="wav")
+    shard = tmp_path / "broken-000000.tar"
+    with tarfile.open(shard, "w") as tar:
+        tar.add(tmp_path / "01a01Wa.wav", arcname="01a01Wa.wav")
+    with pytest.raises(ValueError, match="01a01Wa"):
+        list(ShardedEmoDBDataset([str(shard)]))
+
+
+def test_write_shards_rejects_unknown_label(tmp_path):
+    torchaudio.save(str(tmp_path / "01a01Xa.wav"), torch.randn(1, 16000), 16000, format="wav")
+    with pytest.raises(ValueError, match="01a01Xa.wav"):
+        write_shards(str(tmp_path), str(tmp_path / "shards"))
+    assert not (tmp_path / "shards").exists()
+
+
+def test_compact_int16_batches(tmp_emodb):
+    """Compact mode must ship int16 raw batches that dequantize close to the float path."""
+    dm = EmoDataModule(str(tmp_emodb), batch_size=2, split_ratio=0.5, compact=True)
+    dm.setup()
+    ref = EmoDBDataset(str(tmp_emodb), files_list=dm.test_ds.files)
+
+    x, y = next(iter(dm.val_dataloader()))
+    assert x.dtype == torch.int16 and x.ndim == 3
+
+    x, y = dm.on_after_batch_transfer((x, y), 0)
+    assert x.dtype == torch.float32
+    expected = torch.stack([ref[i][0].clamp(-1, 1) for i in range(len(ref))])
+    assert torch.allclose(x, expected, atol=1e-4)
+
+
+def test_compact_keeps_source_pcm(tmp_path):
+    """16-bit 16 kHz sources must come out of compact mode bit-exact, full range included."""
+    pcm = torch.randint(-32768, 32768, (1, 16000), dtype=torch.int16)
+    pcm[0, :2] = torch.tensor([-32768, 32767], dtype=torch.int16)
+    torchaudio.save(str(tmp_path / "01a01Wa.wav"), pcm, 16000, format="wav", encoding="PCM_S", bits_per_sample=16)
+
+    features, _ = EmoDBDataset(str(tmp_path), compact=True)[0]
+    assert features.dtype == torch.int16
+    assert torch.equal(features, pcm)
+
+
+@pytest.mark.parametrize("channels", [1, 40])
+def test_pad_batch_matches_pad_and_stack(channels):
+    """pad_batch must match F.pad + torch.stack, including in (possibly reused) pinned memory."""
+    feats = [torch.randn(channels, n) for n in (7, 3, 5)]
+    expected = torch.stack([F.pad(f, (0, 7 - f.shape[-1])) for f in feats])
+
+    for pin_memory in [False] + [True] * 2 * torch.cuda.is_available():  # the second pinned batch may reuse a block
+        x, lengths = pad_batch(feats, pin_memory=pin_memory)
+        assert torch.equal(x, expected)
+        assert x.is_pinned() == pin_memory
+        assert lengths.tolist() == [7, 3, 5]
+
+
+def test_pad_batch_rejects_mixed_channels():
+    with pytest.raises(ValueError):
+        pad_batch([torch.randn(1, 4), torch.randn(40, 4)])
+
+
+def test_lengths_batches_train(tmp_emodb):
+    """(x, y, lengths) batches must go through the model's training step."""
+    dm = EmoDataModule(str(tmp_emodb), batch_size=2, split_ratio=0.5, num_workers=0, return_lengths=True)
+    dm.setup()
+    x, y, lengths = next(iter(dm.val_dataloader()))
+    assert lengths.tolist() == [16000, 16000]
+
+    loss = EmotionClassifier(input_channels=1).training_step((x, y, lengths), batch_idx=0)
+    assert loss.dim() == 0
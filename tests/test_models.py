@@ -51,3 +51,17 @@ def test_model_forward_and_training(ModelClass):
     loss = model.training_step((x_raw, y), batch_idx=0)
     assert isinstance(loss, torch.Tensor)
     assert loss.dim() == 0
+
+
+@pytest.mark.parametrize('ModelClass', [
+    module.StridedEmotionClassifier,
+    module.SincEmotionClassifier,
+])
+def test_raw_variants_reduce_compute(ModelClass):
+    """Raw-waveform variants must cost at least 10x fewer FLOPs than EmotionClassifier."""
+    baseline = module.EmotionClassifier(input_channels=1).efficiency_report(n_runs=1)
+    report = ModelClass(input_channels=1).efficiency_report(n_runs=1)
+
+    assert set(report) == {"params", "flops", "latency_ms"}
+    assert report["latency_ms"] > 0
+    assert baseline["flops"] / report["flops"] >= 10